@@ -1,35 +1,127 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 import pdfplumber
+import pypdfium2 as pdfium
 import pandas as pd
+import numpy as np
+import orjson
 import os
-import tempfile
+import io
 import json
+import logging
+import sqlite3
 from datetime import datetime
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, BaseDocTemplate, Frame, PageTemplate, NextPageTemplate
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
+class OrjsonProvider(JSONProvider):
+    """Serialize jsonify() responses and parse request bodies with orjson"""
+    # Sorted keys like Flask's default provider, so month maps arrive in calendar order;
+    # non-string keys are stringified rather than rejected, as the stdlib json module does
+    OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.OPTIONS), mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for React frontend
 
-# Create uploads directory if it doesn't exist
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# Log at INFO by default; set DEBUG=1 to see per-page/per-row parsing detail.
+# Only this module's logger is raised so pdfminer's own debug output stays off.
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG if os.environ.get('DEBUG') else logging.INFO)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# In-memory storage for transactions organized by year/month (in production, use a database)
-# Structure: {"2024": {"01": {"transactions": [...], "pdf_info": {...}}, "02": {...}}}
-financial_data = {}
+# Statements shorter than this are parsed in-process; worker startup would cost more than it saves
+PARALLEL_MIN_PAGES = 8
+
+# SQLite database holding one row per uploaded month and one row per transaction.
+# Anchored next to this file so the same data is used whatever directory the server is started from.
+app.config['DATABASE'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'finance.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS months (
+    year TEXT NOT NULL,
+    month TEXT NOT NULL,
+    pdf_filename TEXT,
+    pdf_upload_date TEXT,
+    pdf_transaction_count INTEGER,
+    processed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (year, month)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    year TEXT NOT NULL,
+    month TEXT NOT NULL,
+    date TEXT,
+    description TEXT,
+    amount REAL,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_year_month ON transactions (year, month);
+"""
 
-# Debug: Print initial state
-print("Backend starting - financial_data initialized:", financial_data)
+# Columns returned to the frontend for a transaction
+TRANSACTION_COLUMNS = 'id, date, description, amount, category'
+
+def init_db():
+    """Create the database schema if needed and switch the file to WAL mode"""
+    conn = sqlite3.connect(app.config['DATABASE'])
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+    finally:
+        conn.close()
+
+def get_db():
+    """Return the SQLite connection for the current request, opening it on first use"""
+    if 'db' not in g:
+        g.db = sqlite3.connect(app.config['DATABASE'])
+        g.db.row_factory = sqlite3.Row
+        g.db.execute('PRAGMA synchronous=NORMAL')
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exception):
+    """Close the request's SQLite connection"""
+    db = g.pop('db', None)
+    if db is not None:
+        db.close()
+
+def fetch_transactions(db, year, month=None):
+    """Load transactions for a year (or a single month) in upload order as plain dicts"""
+    if month is None:
+        rows = db.execute(
+            f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE year = ? ORDER BY rowid', (year,)
+        )
+    else:
+        rows = db.execute(
+            f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE year = ? AND month = ? ORDER BY rowid',
+            (year, month)
+        )
+    return [dict(row) for row in rows]
+
+init_db()
+logger.info("Backend starting - database: %s", os.path.abspath(app.config['DATABASE']))
 
 # Predefined categories
 CATEGORIES = [
@@ -84,6 +176,13 @@ CATEGORIZATION_RULES = {
     "Professional Services": ["legal", "accounting", "consulting", "lawyer", "cpa"]
 }
 
+# Flattened (keyword, category) pairs in rule priority order, built once at import
+_KEYWORD_CATEGORIES = tuple(
+    (keyword, category)
+    for category, keywords in CATEGORIZATION_RULES.items()
+    for keyword in keywords
+)
+
 # Vendor normalization rules to group similar vendor strings under one name
 VENDOR_NORMALIZATION_RULES = [
     (re.compile(r"\bAFFIRM\b", re.IGNORECASE), "Affirm"),
@@ -99,10 +198,14 @@ VENDOR_NORMALIZATION_RULES = [
     (re.compile(r"\bUBER\b", re.IGNORECASE), "Uber"),
     (re.compile(r"\bLYFT\b", re.IGNORECASE), "Lyft"),
 ]
+# Fallback cleanup: everything except letters and whitespace
+_NON_ALPHA_RE = re.compile(r"[^A-Za-z\s]")
 
+@lru_cache(maxsize=4096)
 def normalize_vendor(description: str) -> str:
     """Map noisy transaction descriptions to a normalized vendor name.
     Uses explicit regex rules first, then a heuristic fallback.
+    Memoized because the same vendor string recurs across many rows.
     """
     if not description:
         return "Unknown"
@@ -110,15 +213,18 @@ def normalize_vendor(description: str) -> str:
         if pattern.search(description):
             return name
     # Fallback: strip numbers/symbols and take first 2-3 words
-    cleaned = re.sub(r"[^A-Za-z\s]", "", description).strip()
+    cleaned = _NON_ALPHA_RE.sub("", description).strip()
     if not cleaned:
         return description
     words = cleaned.split()
     candidate = " ".join(words[:3]) if len(words) >= 3 else " ".join(words)
     return candidate.title()
 
-def categorize_transaction(description, amount=None):
-    """Auto-categorize transaction based on description keywords"""
+@lru_cache(maxsize=8192)
+def categorize_transaction(description, amount_sign=0):
+    """Auto-categorize transaction based on description keywords.
+    amount_sign is -1/0/1 rather than the raw amount so repeated descriptions hit the cache.
+    """
     description_lower = description.lower()
     # Special high-priority logic (examples requested)
     if "tesla" in description_lower:
@@ -137,7 +243,7 @@ def categorize_transaction(description, amount=None):
         return "Bank Fees"
     if "square inc" in description_lower or description_lower.startswith("square ") or description_lower.startswith("sq *"):
         # Positive amounts are sales; negatives back out to Uncategorized per request
-        if amount is not None and amount > 0:
+        if amount_sign > 0:
             return "Sales"
         return "Uncategorized"
     if "apple" in description_lower:
@@ -147,158 +253,199 @@ def categorize_transaction(description, amount=None):
     if "cubicasa" in description_lower:
         return "Software"
 
-    for category, keywords in CATEGORIZATION_RULES.items():
-        for keyword in keywords:
-            if keyword in description_lower:
-                return category
+    for keyword, category in _KEYWORD_CATEGORIES:
+        if keyword in description_lower:
+            return category
     
     return "Uncategorized"
 
-def extract_transactions_from_pdf(pdf_path):
-    """Extract transaction data from PDF bank statement"""
-    transactions_data = []
+# A statement text line: date, description, trailing amount (e.g. "01/15/24 STARBUCKS #123 (4.50)").
+# Trailing \r is allowed because PDFium ends lines with \r\n.
+_TXN_LINE_RE = re.compile(
+    r'^[ \t]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})[ \t]+(.+?)[ \t]+([-$(]*[\d,]+\.?\d*\)?)[ \t\r]*$',
+    re.MULTILINE
+)
+_DATE_FORMATS = ('%m/%d/%y', '%m/%d/%Y')
+
+# Table cell checks and amount cleanup
+_DATE_RE = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}')
+_AMOUNT_RE = re.compile(r'[\d,]+\.?\d*')
+_CLEAN_AMT_RE = re.compile(r'[,$]')
+
+def _table_rows(page, page_num):
+    """Collect raw (date, description, amount) strings from transaction-shaped table rows on one page"""
+    rows = []
     
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            print(f"Processing PDF with {len(pdf.pages)} pages")
-            
-            for page_num, page in enumerate(pdf.pages):
-                print(f"Processing page {page_num + 1}")
+    tables = page.extract_tables()
+    logger.debug("Found %s tables on page %s", len(tables) if tables else 0, page_num + 1)
+    
+    for table_num, table in enumerate(tables or []):
+        logger.debug("Processing table %s with %s rows", table_num + 1, len(table))
+        
+        # Look for transaction rows (typically have date, description, amount)
+        for row_num, row in enumerate(table):
+            if row and len(row) >= 3:
+                # Clean the row data
+                cleaned_row = [cell.strip() if cell else "" for cell in row]
+                logger.debug("Row %s: %s", row_num, cleaned_row)
                 
-                # Try to extract tables first
-                tables = page.extract_tables()
-                print(f"Found {len(tables) if tables else 0} tables on page {page_num + 1}")
+                # Skip header rows and empty rows
+                if not cleaned_row[0] or not any(cleaned_row):
+                    continue
                 
-                if tables:
-                    for table_num, table in enumerate(tables):
-                        print(f"Processing table {table_num + 1} with {len(table)} rows")
-                        
-                        # Look for transaction rows (typically have date, description, amount)
-                        for row_num, row in enumerate(table):
-                            if row and len(row) >= 3:
-                                # Clean the row data
-                                cleaned_row = [cell.strip() if cell else "" for cell in row]
-                                print(f"Row {row_num}: {cleaned_row}")
-                                
-                                # Skip header rows and empty rows
-                                if not cleaned_row[0] or not any(cleaned_row):
-                                    continue
-                                
-                                # Try to identify transaction rows
-                                # Look for date pattern and amount pattern
-                                date_str = cleaned_row[0]
-                                description = " ".join(cleaned_row[1:-1]) if len(cleaned_row) > 2 else cleaned_row[1]
-                                amount_str = cleaned_row[-1] if len(cleaned_row) > 1 else ""
-                                
-                                print(f"Checking: date='{date_str}', description='{description}', amount='{amount_str}'")
-                                
-                                # Check if this looks like a transaction row
-                                if (re.match(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', date_str) and 
-                                    re.search(r'[\d,]+\.?\d*', amount_str)):
-                                    
-                                    try:
-                                        # Parse amount (remove commas, handle negative amounts)
-                                        amount_clean = re.sub(r'[,$]', '', amount_str)
-                                        if amount_clean.startswith('(') and amount_clean.endswith(')'):
-                                            # Negative amount in parentheses
-                                            amount_clean = '-' + amount_clean[1:-1]
-                                        amount = float(amount_clean)
-                                        
-                                        # Parse date - try different formats
-                                        try:
-                                            date_obj = datetime.strptime(date_str, '%m/%d/%y').date()
-                                        except ValueError:
-                                            try:
-                                                date_obj = datetime.strptime(date_str, '%m/%d/%Y').date()
-                                            except ValueError:
-                                                print(f"Could not parse date: {date_str}")
-                                                continue
-                                        
-                                        # Auto-categorize
-                                        category = categorize_transaction(description, amount)
-                                        
-                                        transaction = {
-                                            "date": date_obj.isoformat(),
-                                            "description": description,
-                                            "amount": amount,
-                                            "category": category
-                                        }
-                                        
-                                        transactions_data.append(transaction)
-                                        print(f"Added transaction: {transaction}")
-                                        
-                                    except (ValueError, TypeError) as e:
-                                        print(f"Error parsing row: {e}")
-                                        continue
+                # Try to identify transaction rows
+                # Look for date pattern and amount pattern
+                date_str = cleaned_row[0]
+                description = " ".join(cleaned_row[1:-1]) if len(cleaned_row) > 2 else cleaned_row[1]
+                amount_str = cleaned_row[-1] if len(cleaned_row) > 1 else ""
                 
-                # Always try text extraction (since tables weren't found)
-                print(f"No tables found, trying text extraction on page {page_num + 1}")
-                text = page.extract_text()
-                if text:
-                    print(f"Extracted text length: {len(text)} characters")
-                    print(f"First 500 characters: {text[:500]}")
-                    
-                    # Simple text parsing for transaction lines
-                    lines = text.split('\n')
-                    print(f"Found {len(lines)} lines of text")
-                    
-                    for line_num, line in enumerate(lines):
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        # Look for lines with date and amount patterns
-                        if re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', line) and re.search(r'[\d,]+\.?\d*', line):
-                            print(f"Potential transaction line {line_num}: {line}")
-                            
-                            # Try different parsing approaches
-                            # Approach 1: Split by spaces
-                            parts = line.split()
-                            if len(parts) >= 3:
-                                try:
-                                    date_str = parts[0]
-                                    amount_str = parts[-1]
-                                    description = " ".join(parts[1:-1])
-                                    
-                                    print(f"Parsed: date='{date_str}', description='{description}', amount='{amount_str}'")
-                                    
-                                    amount_clean = re.sub(r'[,$]', '', amount_str)
-                                    if amount_clean.startswith('(') and amount_clean.endswith(')'):
-                                        amount_clean = '-' + amount_clean[1:-1]
-                                    amount = float(amount_clean)
-                                    
-                                    # Try different date formats
-                                    try:
-                                        date_obj = datetime.strptime(date_str, '%m/%d/%y').date()
-                                    except ValueError:
-                                        try:
-                                            date_obj = datetime.strptime(date_str, '%m/%d/%Y').date()
-                                        except ValueError:
-                                            print(f"Could not parse date: {date_str}")
-                                            continue
-                                    category = categorize_transaction(description, amount)
-                                    
-                                    transaction = {
-                                        "date": date_obj.isoformat(),
-                                        "description": description,
-                                        "amount": amount,
-                                        "category": category
-                                    }
-                                    
-                                    transactions_data.append(transaction)
-                                    print(f"Added transaction: {transaction}")
-                                    
-                                except (ValueError, TypeError) as e:
-                                    print(f"Error parsing line: {e}")
-                                    continue
-                else:
-                    print(f"No text extracted from page {page_num + 1}")
+                logger.debug("Checking: date=%r, description=%r, amount=%r", date_str, description, amount_str)
+                
+                # Check if this looks like a transaction row
+                if _DATE_RE.match(date_str) and _AMOUNT_RE.search(amount_str):
+                    rows.append((date_str, description, amount_str))
     
-    except Exception as e:
-        print(f"Error processing PDF: {str(e)}")
+    return rows
+
+def _text_rows(page, page_num):
+    """Collect raw (date, description, amount) strings from the text lines of one page"""
+    text = page.extract_text(layout=False)
+    if not text:
+        logger.debug("No text extracted from page %s", page_num + 1)
         return []
     
-    return transactions_data
+    logger.debug("Extracted %s characters of text from page %s", len(text), page_num + 1)
+    # Collect every "date description amount" line of the page in one regex scan
+    return _TXN_LINE_RE.findall(text)
+
+def _fast_text_rows(pdf_bytes):
+    """Collect raw (date, description, amount) strings from the text of every page using PDFium,
+    which parses content streams in C++ and is far faster than pdfminer's text path
+    """
+    rows = []
+    doc = pdfium.PdfDocument(pdf_bytes)
+    try:
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            logger.debug("Extracted %s characters of text from page %s", len(text), page_num + 1)
+            rows.extend(_TXN_LINE_RE.findall(text))
+    finally:
+        doc.close()
+    return rows
+
+def _release_page(page):
+    """Drop pdfplumber's cached layout/objects for a page that has been parsed.
+    Newer pdfplumber versions provide page.close(); 0.9 only has flush_cache().
+    """
+    close = getattr(page, 'close', None) or page.flush_cache
+    close()
+
+def _extract_page_rows(page, page_num):
+    """Collect raw rows from one page of a table-layout statement.
+    A page without transaction tables falls back to its text.
+    """
+    logger.debug("Processing page %s", page_num + 1)
+    try:
+        rows = _table_rows(page, page_num)
+        if rows:
+            return rows
+        return _text_rows(page, page_num)
+    finally:
+        _release_page(page)
+
+def _parse_dates(date_strings):
+    """Convert statement dates to ISO strings (NaN where no format matches).
+    A statement only has a few dozen distinct dates, so each one is parsed once and broadcast back.
+    """
+    codes, uniques = pd.factorize(date_strings)
+    uniques = pd.Series(uniques)
+    # Try each statement format, keeping the first that matches
+    dates = pd.to_datetime(uniques, format=_DATE_FORMATS[0], errors='coerce')
+    for date_format in _DATE_FORMATS[1:]:
+        dates = dates.fillna(pd.to_datetime(uniques, format=date_format, errors='coerce'))
+    iso = dates.dt.strftime('%Y-%m-%d').to_numpy()
+    return pd.Series(iso[codes], index=date_strings.index).where(codes >= 0)
+
+def _build_transactions(rows):
+    """Parse raw row strings into transaction dicts in one vectorized pass.
+    Rows whose date or amount does not parse are dropped.
+    """
+    if not rows:
+        return []
+    df = pd.DataFrame(rows, columns=['date', 'description', 'amount'])
+    
+    # Parse amount (remove commas/dollar signs, "(12.34)" is a negative amount)
+    amount_str = df['amount'].str.replace(_CLEAN_AMT_RE, '', regex=True)
+    in_parens = amount_str.str.startswith('(') & amount_str.str.endswith(')')
+    amount_str = amount_str.mask(in_parens, '-' + amount_str.str[1:-1])
+    df['amount'] = pd.to_numeric(amount_str, errors='coerce')
+    
+    df['date'] = _parse_dates(df['date'])
+    
+    parsed = df.dropna(subset=['date', 'amount'])
+    if len(parsed) < len(df):
+        logger.info("Skipped %s rows with unparseable date or amount", len(df) - len(parsed))
+    
+    # Auto-categorize (memoized per description/sign)
+    parsed = parsed.assign(category=[
+        categorize_transaction(description, (amount > 0) - (amount < 0))
+        for description, amount in zip(parsed['description'], parsed['amount'])
+    ])
+    return parsed.to_dict('records')
+
+def _process_pages(pdf_bytes, page_numbers):
+    """Open the PDF and collect raw rows from a run of pages (worker process entry point)"""
+    rows = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page_num in page_numbers:
+            rows.extend(_extract_page_rows(pdf.pages[page_num], page_num))
+    return rows
+
+def extract_transactions_from_pdf(pdf_file):
+    """Extract transaction data from a PDF bank statement given as a binary file object"""
+    try:
+        with pdfplumber.open(pdf_file) as pdf:
+            num_pages = len(pdf.pages)
+            logger.info("Processing PDF with %s pages", num_pages)
+            if not num_pages:
+                return []
+            
+            # Table extraction is expensive, so only probe the first page. If it has transaction
+            # rows the statement is parsed from tables, otherwise from text only.
+            rows = _table_rows(pdf.pages[0], 0)
+            _release_page(pdf.pages[0])
+            if rows:
+                logger.info("Parsing statement from tables")
+                workers = min(os.cpu_count() or 1, num_pages - 1)
+                if num_pages < PARALLEL_MIN_PAGES or workers < 2:
+                    for page_num in range(1, num_pages):
+                        rows.extend(_extract_page_rows(pdf.pages[page_num], page_num))
+                    return _build_transactions(rows)
+        
+        pdf_file.seek(0)
+        pdf_bytes = pdf_file.read()
+        
+        if not rows:
+            logger.info("Parsing statement from text")
+            return _build_transactions(_fast_text_rows(pdf_bytes))
+        
+        # Workers get the raw bytes (picklable) and each opens its own in-memory copy.
+        # Split the remaining pages into one contiguous run per worker; map() keeps page order
+        chunk_size = -(-(num_pages - 1) // workers)
+        chunks = [range(start, min(start + chunk_size, num_pages)) for start in range(1, num_pages, chunk_size)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            for page_rows in executor.map(partial(_process_pages, pdf_bytes), chunks):
+                rows.extend(page_rows)
+        
+        return _build_transactions(rows)
+    
+    except Exception:
+        logger.exception("Error processing PDF")
+        return []
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
@@ -310,8 +457,7 @@ def upload_file():
     year = request.form.get('year')
     month = request.form.get('month')
     
-    print(f"Upload request received: file={file.filename}, year={year}, month={month}")
-    print(f"Current financial_data keys before upload: {list(financial_data.keys())}")
+    logger.info("Upload request received: file=%s, year=%s, month=%s", file.filename, year, month)
     
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
@@ -321,43 +467,33 @@ def upload_file():
     
     if file and file.filename.lower().endswith('.pdf'):
         try:
-            # Save uploaded file temporarily
             filename = file.filename
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
             
-            # Extract transactions from PDF
-            extracted_transactions = extract_transactions_from_pdf(filepath)
+            # Extract transactions straight from the upload stream (nothing is written to disk)
+            extracted_transactions = extract_transactions_from_pdf(file.stream)
             
             # Add unique IDs to transactions
             for i, transaction in enumerate(extracted_transactions):
                 transaction['id'] = f"{year}_{month}_{filename}_{i}"
             
-            # Initialize year/month structure if needed
-            if year not in financial_data:
-                financial_data[year] = {}
-            if month not in financial_data[year]:
-                financial_data[year][month] = {
-                    'transactions': [],
-                    'pdf_info': None,
-                    'processed': False
-                }
-            
-            # Store transactions and PDF info
-            financial_data[year][month]['transactions'] = extracted_transactions
-            financial_data[year][month]['pdf_info'] = {
-                'filename': filename,
-                'upload_date': datetime.now().isoformat(),
-                'transaction_count': len(extracted_transactions)
-            }
-            
-            print(f"Data stored successfully for {year}/{month}")
-            print(f"Financial_data keys after upload: {list(financial_data.keys())}")
-            if year in financial_data:
-                print(f"Months in {year}: {list(financial_data[year].keys())}")
+            # Replace the month's transactions and PDF info in one database transaction
+            db = get_db()
+            with db:
+                db.execute(
+                    'INSERT INTO months (year, month, pdf_filename, pdf_upload_date, pdf_transaction_count) '
+                    'VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (year, month) DO UPDATE SET pdf_filename = excluded.pdf_filename, '
+                    'pdf_upload_date = excluded.pdf_upload_date, pdf_transaction_count = excluded.pdf_transaction_count',
+                    (year, month, filename, datetime.now().isoformat(), len(extracted_transactions))
+                )
+                db.execute('DELETE FROM transactions WHERE year = ? AND month = ?', (year, month))
+                db.executemany(
+                    'INSERT INTO transactions (id, year, month, date, description, amount, category) '
+                    'VALUES (:id, :year, :month, :date, :description, :amount, :category)',
+                    [{**transaction, 'year': year, 'month': month} for transaction in extracted_transactions]
+                )
             
-            # Clean up uploaded file
-            os.remove(filepath)
+            logger.info("Data stored successfully for %s/%s", year, month)
             
             return jsonify({
                 'message': 'File processed successfully',
@@ -377,59 +513,70 @@ def upload_file():
 @app.route('/api/years', methods=['GET'])
 def get_years():
     """Get all available years"""
-    return jsonify({'years': list(financial_data.keys())})
+    rows = get_db().execute('SELECT year FROM months GROUP BY year ORDER BY MIN(rowid)')
+    return jsonify({'years': [row['year'] for row in rows]})
 
 @app.route('/api/months/<year>', methods=['GET'])
 def get_months(year):
     """Get all available months for a specific year"""
-    if year in financial_data:
-        return jsonify({'months': list(financial_data[year].keys())})
-    return jsonify({'months': []})
+    rows = get_db().execute('SELECT month FROM months WHERE year = ? ORDER BY rowid', (year,))
+    return jsonify({'months': [row['month'] for row in rows]})
 
 @app.route('/api/transactions/<year>/<month>', methods=['GET'])
 def get_transactions_by_month(year, month):
     """Get transactions for a specific year/month"""
-    if year in financial_data and month in financial_data[year]:
+    db = get_db()
+    month_row = db.execute('SELECT * FROM months WHERE year = ? AND month = ?', (year, month)).fetchone()
+    if month_row:
+        pdf_info = None
+        if month_row['pdf_filename'] is not None:
+            pdf_info = {
+                'filename': month_row['pdf_filename'],
+                'upload_date': month_row['pdf_upload_date'],
+                'transaction_count': month_row['pdf_transaction_count']
+            }
         return jsonify({
-            'transactions': financial_data[year][month]['transactions'],
-            'pdf_info': financial_data[year][month]['pdf_info'],
-            'processed': financial_data[year][month]['processed']
+            'transactions': fetch_transactions(db, year, month),
+            'pdf_info': pdf_info,
+            'processed': bool(month_row['processed'])
         })
     return jsonify({'transactions': [], 'pdf_info': None, 'processed': False})
 
 @app.route('/api/transactions/<year>/<month>/process', methods=['POST'])
 def mark_month_processed(year, month):
     """Mark a month as processed"""
-    print(f"Processing request to mark {year}/{month} as processed")
-    print(f"Available years: {list(financial_data.keys())}")
-    
-    if year in financial_data:
-        print(f"Available months for {year}: {list(financial_data[year].keys())}")
-        if month in financial_data[year]:
-            financial_data[year][month]['processed'] = True
-            print(f"Successfully marked {year}/{month} as processed")
-            return jsonify({'message': 'Month marked as processed'})
-        else:
-            print(f"Month {month} not found in year {year}")
-            return jsonify({'error': f'Month {month} not found in year {year}'}), 404
-    else:
-        print(f"Year {year} not found in financial_data")
-        return jsonify({'error': f'Year {year} not found'}), 404
+    logger.info("Processing request to mark %s/%s as processed", year, month)
+    
+    db = get_db()
+    with db:
+        updated = db.execute(
+            'UPDATE months SET processed = 1 WHERE year = ? AND month = ?', (year, month)
+        ).rowcount
+    if updated:
+        logger.info("Successfully marked %s/%s as processed", year, month)
+        return jsonify({'message': 'Month marked as processed'})
+    
+    if db.execute('SELECT 1 FROM months WHERE year = ? LIMIT 1', (year,)).fetchone():
+        logger.info("Month %s not found in year %s", month, year)
+        return jsonify({'error': f'Month {month} not found in year {year}'}), 404
+    logger.info("Year %s not found in database", year)
+    return jsonify({'error': f'Year {year} not found'}), 404
 
 @app.route('/api/workflow/status/<year>', methods=['GET'])
 def get_workflow_status(year):
     """Get workflow completion status for a year"""
-    if year not in financial_data:
+    rows = get_db().execute('SELECT month, processed FROM months WHERE year = ? ORDER BY rowid', (year,)).fetchall()
+    if not rows:
         return jsonify({'total_months': 0, 'processed_months': 0, 'completed': False})
     
-    total_months = len(financial_data[year])
-    processed_months = sum(1 for month_data in financial_data[year].values() if month_data['processed'])
+    total_months = len(rows)
+    processed_months = sum(1 for row in rows if row['processed'])
     
     return jsonify({
         'total_months': total_months,
         'processed_months': processed_months,
         'completed': processed_months == total_months and total_months > 0,
-        'months': {month: data['processed'] for month, data in financial_data[year].items()}
+        'months': {row['month']: bool(row['processed']) for row in rows}
     })
 
 @app.route('/api/transactions/<year>/<month>/<transaction_id>', methods=['PUT'])
@@ -437,31 +584,39 @@ def update_transaction(year, month, transaction_id):
     """Update a specific transaction"""
     data = request.get_json()
     
-    if year in financial_data and month in financial_data[year]:
-        for transaction in financial_data[year][month]['transactions']:
-            if transaction.get('id') == transaction_id:
-                if 'category' in data:
-                    transaction['category'] = data['category']
-                if 'description' in data:
-                    transaction['description'] = data['description']
-                if 'amount' in data:
-                    transaction['amount'] = data['amount']
-                if 'date' in data:
-                    transaction['date'] = data['date']
-                
-                return jsonify({'message': 'Transaction updated successfully', 'transaction': transaction})
+    # Only the editable columns present in the request are updated
+    updates = {field: data[field] for field in ('category', 'description', 'amount', 'date') if field in data}
+    
+    db = get_db()
+    with db:
+        if updates:
+            db.execute(
+                f"UPDATE transactions SET {', '.join(f'{field} = :{field}' for field in updates)} "
+                'WHERE id = :id AND year = :year AND month = :month',
+                {**updates, 'id': transaction_id, 'year': year, 'month': month}
+            )
+        transaction = db.execute(
+            f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE id = ? AND year = ? AND month = ?',
+            (transaction_id, year, month)
+        ).fetchone()
+    
+    if transaction:
+        return jsonify({'message': 'Transaction updated successfully', 'transaction': dict(transaction)})
     
     return jsonify({'error': 'Transaction not found'}), 404
 
 @app.route('/api/transactions/<year>/<month>/<transaction_id>', methods=['DELETE'])
 def delete_transaction(year, month, transaction_id):
     """Delete a specific transaction"""
-    if year in financial_data and month in financial_data[year]:
-        transactions_list = financial_data[year][month]['transactions']
-        for i, transaction in enumerate(transactions_list):
-            if transaction.get('id') == transaction_id:
-                deleted_transaction = transactions_list.pop(i)
-                return jsonify({'message': 'Transaction deleted successfully', 'transaction': deleted_transaction})
+    db = get_db()
+    with db:
+        transaction = db.execute(
+            f'SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE id = ? AND year = ? AND month = ?',
+            (transaction_id, year, month)
+        ).fetchone()
+        if transaction:
+            db.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+            return jsonify({'message': 'Transaction deleted successfully', 'transaction': dict(transaction)})
     
     return jsonify({'error': 'Transaction not found'}), 404
 
@@ -474,28 +629,32 @@ def add_transaction(year, month):
     if not all(field in data for field in required_fields):
         return jsonify({'error': 'Missing required fields: date, description, amount'}), 400
     
-    if year not in financial_data:
-        financial_data[year] = {}
-    if month not in financial_data[year]:
-        financial_data[year][month] = {
-            'transactions': [],
-            'pdf_info': None,
-            'processed': False
+    db = get_db()
+    with db:
+        db.execute('INSERT OR IGNORE INTO months (year, month) VALUES (?, ?)', (year, month))
+        
+        # Generate unique ID (skip numbers freed up by deletes that are still taken)
+        transaction_count = db.execute(
+            'SELECT COUNT(*) FROM transactions WHERE year = ? AND month = ?', (year, month)
+        ).fetchone()[0]
+        transaction_id = f"{year}_{month}_manual_{transaction_count}"
+        while db.execute('SELECT 1 FROM transactions WHERE id = ?', (transaction_id,)).fetchone():
+            transaction_count += 1
+            transaction_id = f"{year}_{month}_manual_{transaction_count}"
+        
+        new_transaction = {
+            'id': transaction_id,
+            'date': data['date'],
+            'description': data['description'],
+            'amount': float(data['amount']),
+            'category': data.get('category', 'Uncategorized')
         }
-    
-    # Generate unique ID
-    transaction_count = len(financial_data[year][month]['transactions'])
-    transaction_id = f"{year}_{month}_manual_{transaction_count}"
-    
-    new_transaction = {
-        'id': transaction_id,
-        'date': data['date'],
-        'description': data['description'],
-        'amount': float(data['amount']),
-        'category': data.get('category', 'Uncategorized')
-    }
-    
-    financial_data[year][month]['transactions'].append(new_transaction)
+        
+        db.execute(
+            'INSERT INTO transactions (id, year, month, date, description, amount, category) '
+            'VALUES (:id, :year, :month, :date, :description, :amount, :category)',
+            {**new_transaction, 'year': year, 'month': month}
+        )
     
     return jsonify({'message': 'Transaction added successfully', 'transaction': new_transaction})
 
@@ -507,38 +666,43 @@ def get_categories():
 @app.route('/api/summary/<year>', methods=['GET'])
 def get_summary(year):
     """Get aggregated summary of all transactions for a specific year"""
-    if year not in financial_data:
-        return jsonify({
-            'total_income': 0,
-            'total_expenses': 0,
-            'category_totals': {},
-            'transaction_count': 0,
-            'monthly_totals': {}
-        })
+    # One indexed scan of the year, grouped by (month, category); months without
+    # transactions come through the LEFT JOIN with a zero count
+    rows = get_db().execute(
+        'SELECT m.month, t.category, COUNT(t.id) AS transaction_count, '
+        'SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END) AS income, '
+        'SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END) AS expenses, '
+        'SUM(t.amount < 0) AS expense_count '
+        'FROM months m LEFT JOIN transactions t ON t.year = m.year AND t.month = m.month '
+        'WHERE m.year = ? GROUP BY m.month, t.category ORDER BY MIN(m.rowid)',
+        (year,)
+    )
     
-    # Collect all transactions for the year
-    all_transactions = []
-    monthly_totals = {}
+    # Fold the small grouped result into per-month and per-category totals
+    month_sums = {}
+    category_totals = {}
+    for row in rows:
+        sums = month_sums.setdefault(row['month'], [0, 0.0, 0.0])
+        sums[0] += row['transaction_count']
+        sums[1] += row['income']
+        sums[2] += row['expenses']
+        # Category totals only count categorized expenses; uncategorized ones still count in the totals above
+        if row['expense_count'] and row['category'] is not None:
+            category_totals[row['category']] = category_totals.get(row['category'], 0.0) + row['expenses']
     
-    for month, month_data in financial_data[year].items():
-        month_transactions = month_data['transactions']
-        all_transactions.extend(month_transactions)
-        
-        # Calculate monthly totals
-        if month_transactions:
-            df_month = pd.DataFrame(month_transactions)
-            df_month['amount'] = pd.to_numeric(df_month['amount'])
-            monthly_income = df_month[df_month['amount'] > 0]['amount'].sum()
-            monthly_expenses = abs(df_month[df_month['amount'] < 0]['amount'].sum())
+    monthly_totals = {}
+    for month, (count, income, expenses) in month_sums.items():
+        if count:
             monthly_totals[month] = {
-                'income': float(monthly_income),
-                'expenses': float(monthly_expenses),
-                'net': float(monthly_income - monthly_expenses)
+                'income': float(income),
+                'expenses': float(expenses),
+                'net': float(income - expenses)
             }
         else:
             monthly_totals[month] = {'income': 0, 'expenses': 0, 'net': 0}
     
-    if not all_transactions:
+    transaction_count = sum(count for count, _, _ in month_sums.values())
+    if not transaction_count:
         return jsonify({
             'total_income': 0,
             'total_expenses': 0,
@@ -547,103 +711,152 @@ def get_summary(year):
             'monthly_totals': monthly_totals
         })
     
-    # Convert to DataFrame for easier aggregation
-    df = pd.DataFrame(all_transactions)
-    df['amount'] = pd.to_numeric(df['amount'])
-    
-    # Calculate totals
-    total_income = df[df['amount'] > 0]['amount'].sum()
-    total_expenses = abs(df[df['amount'] < 0]['amount'].sum())
-    
-    # Calculate category totals (only for expenses)
-    expense_df = df[df['amount'] < 0].copy()
-    expense_df['amount'] = abs(expense_df['amount'])
-    category_totals = expense_df.groupby('category')['amount'].sum().to_dict()
-    
     return jsonify({
-        'total_income': float(total_income),
-        'total_expenses': float(total_expenses),
-        'category_totals': {k: float(v) for k, v in category_totals.items()},
-        'transaction_count': len(all_transactions),
+        'total_income': float(sum(income for _, income, _ in month_sums.values())),
+        'total_expenses': float(sum(expenses for _, _, expenses in month_sums.values())),
+        'category_totals': {category: float(total) for category, total in category_totals.items()},
+        'transaction_count': transaction_count,
         'monthly_totals': monthly_totals
     })
 
+# Report layout shared by every export: half-inch margins, portrait first page, landscape matrix pages.
+# The stylesheet is built once; frames and page templates hold per-build state so _make_doc creates them per request.
+_PAGE_MARGIN = 0.5*inch
+_LANDSCAPE_SIZE = landscape(letter)
+_LANDSCAPE_WIDTH = _LANDSCAPE_SIZE[0] - 2*_PAGE_MARGIN
+_LANDSCAPE_HEIGHT = _LANDSCAPE_SIZE[1] - 2*_PAGE_MARGIN
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=1  # Center alignment
+)
+_NORMAL_STYLE = _STYLES['Normal']
+_HEADING2_STYLE = _STYLES['Heading2']
+
+# Table styles for the report; setStyle() only reads the commands so one instance serves every export
+_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+_CATEGORY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+_PROFIT_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('LINEABOVE', (0, 1), (-1, 1), 0.5, colors.black),
+    ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+])
+_MATRIX_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ALIGN', (1, 0), (-1, 0), 'CENTER'),
+    ('ALIGN', (1, 1), (-1, -2), 'CENTER'),
+    ('ALIGN', (1, -1), (-1, -1), 'CENTER'),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+_INCOME_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+def _make_doc(target):
+    """Create the report document with 'Portrait' (first page) and 'Landscape' (matrix pages) templates"""
+    doc = BaseDocTemplate(
+        target,
+        pagesize=letter,
+        leftMargin=_PAGE_MARGIN,
+        rightMargin=_PAGE_MARGIN,
+        topMargin=_PAGE_MARGIN,
+        bottomMargin=_PAGE_MARGIN
+    )
+    portrait_frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='portrait_frame')
+    landscape_frame = Frame(doc.leftMargin, doc.bottomMargin, _LANDSCAPE_WIDTH, _LANDSCAPE_HEIGHT, id='landscape_frame')
+    doc.addPageTemplates([
+        PageTemplate(id='Portrait', frames=[portrait_frame], pagesize=letter),
+        PageTemplate(id='Landscape', frames=[landscape_frame], pagesize=_LANDSCAPE_SIZE),
+    ])
+    return doc
+
+def _normalize_txns(transactions):
+    """Build the typed report frame: float amount, parsed date, 1-12 month (NaN if the date is not YYYY-MM-DD)"""
+    df = pd.DataFrame(transactions, columns=['id', 'date', 'description', 'amount', 'category'])
+    df['amount'] = pd.to_numeric(df['amount']).astype(float)
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    df['month'] = df['date'].dt.month
+    df['category'] = df['category'].astype('category')
+    return df
+
 @app.route('/api/export-pdf/<year>', methods=['GET'])
 def export_pdf(year):
     """Generate and return a PDF report of expense summary for a specific year"""
-    print(f"Export PDF requested for year: {year}")
-    print(f"Available years in financial_data: {list(financial_data.keys())}")
+    logger.info("Export PDF requested for year: %s", year)
     
     # Collect all transactions for the year (gracefully handle missing year)
-    all_transactions = []
-    if year in financial_data:
-        print(f"Months available for {year}: {list(financial_data[year].keys())}")
-        for month, month_data in financial_data[year].items():
-            month_transactions = month_data['transactions']
-            print(f"Month {month}: {len(month_transactions)} transactions")
-            all_transactions.extend(month_transactions)
-    else:
-        print(f"Year {year} not found in financial_data - generating empty summary PDF")
+    all_transactions = fetch_transactions(get_db(), year)
+    if not all_transactions:
+        logger.info("No transactions for %s - generating empty summary PDF", year)
     
-    print(f"Total transactions for {year}: {len(all_transactions)}")
+    logger.info("Total transactions for %s: %s", year, len(all_transactions))
     
     try:
         # Calculate summary data
-        # Build DataFrame even if empty
-        if all_transactions:
-            df = pd.DataFrame(all_transactions)
-        else:
-            df = pd.DataFrame(columns=['date', 'description', 'amount', 'category'])
-        if 'amount' in df.columns:
-            df['amount'] = pd.to_numeric(df['amount'])
-        else:
-            df['amount'] = pd.Series(dtype=float)
-        
-        total_income = df[df['amount'] > 0]['amount'].sum() if not df.empty else 0.0
-        total_expenses = abs(df[df['amount'] < 0]['amount'].sum()) if not df.empty else 0.0
-        
-        expense_df = df[df['amount'] < 0].copy() if not df.empty else pd.DataFrame(columns=['date','description','amount','category'])
-        if not expense_df.empty:
-            expense_df['amount'] = abs(expense_df['amount'])
-            category_totals = expense_df.groupby('category')['amount'].sum().to_dict()
-        else:
-            category_totals = {}
-        
-        # Create temporary file for PDF
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file.close()
+        df = _normalize_txns(all_transactions)
         
-        # Create PDF document with multiple page templates (portrait for page 1, landscape for matrix pages)
-        doc = BaseDocTemplate(
-            temp_file.name,
-            pagesize=letter,
-            leftMargin=0.5*inch,
-            rightMargin=0.5*inch,
-            topMargin=0.5*inch,
-            bottomMargin=0.5*inch
+        expense_df = df[df['amount'] < 0].assign(amount=lambda expenses: expenses['amount'].abs())
+        total_income = float(df.loc[df['amount'] > 0, 'amount'].sum())
+        total_expenses = float(expense_df['amount'].sum())
+        # Per-category expense sums in one grouped pass, already in report order (largest first)
+        category_totals = (
+            expense_df.groupby('category', observed=True)['amount'].sum()
+            .sort_values(ascending=False, kind='stable')
+            .to_dict()
         )
-        # Portrait template (first page)
-        portrait_frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='portrait_frame')
-        portrait_template = PageTemplate(id='Portrait', frames=[portrait_frame], pagesize=letter)
-        # Landscape template (for transactions matrix)
-        landscape_size = landscape(letter)
-        landscape_width = landscape_size[0] - doc.leftMargin - doc.rightMargin
-        landscape_height = landscape_size[1] - doc.topMargin - doc.bottomMargin
-        landscape_frame = Frame(doc.leftMargin, doc.bottomMargin, landscape_width, landscape_height, id='landscape_frame')
-        landscape_template = PageTemplate(id='Landscape', frames=[landscape_frame], pagesize=landscape_size)
-        doc.addPageTemplates([portrait_template, landscape_template])
-        styles = getSampleStyleSheet()
+        
+        # Render into memory; nothing is written to disk
+        pdf_buffer = io.BytesIO()
+        doc = _make_doc(pdf_buffer)
+        landscape_width = _LANDSCAPE_WIDTH
         story = []
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        title = Paragraph(f"Business Expense Summary - {year}", title_style)
+        title = Paragraph(f"Business Expense Summary - {year}", _TITLE_STYLE)
         story.append(title)
         
         # Date range (always show entire selected year Jan–Dec)
@@ -653,7 +866,7 @@ def export_pdf(year):
             date_range = f"Period: {start_label} - {end_label}"
         except Exception:
             date_range = f"Period: {year}"
-        date_para = Paragraph(date_range, styles['Normal'])
+        date_para = Paragraph(date_range, _NORMAL_STYLE)
         story.append(date_para)
         story.append(Spacer(1, 20))
         
@@ -665,47 +878,25 @@ def export_pdf(year):
         ]
         
         summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        summary_table.setStyle(_SUMMARY_TABLE_STYLE)
         
         story.append(summary_table)
         story.append(Spacer(1, 30))
         
         # Category breakdown
-        category_header = Paragraph("Expense Categories", styles['Heading2'])
+        category_header = Paragraph("Expense Categories", _HEADING2_STYLE)
         story.append(category_header)
         story.append(Spacer(1, 12))
         
         if category_totals:
-            # Sort categories by amount (descending)
-            sorted_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)
-            
             # Two-column table without percentages, plus Sum row
             category_data = [['Category', 'Amount']]
-            for category, amount in sorted_categories:
+            for category, amount in category_totals.items():
                 category_data.append([category, f"${amount:,.2f}"])
             category_data.append(['Total', f"${total_expenses:,.2f}"])
             
             category_table = Table(category_data, colWidths=[3.0*inch, 2.0*inch])
-            category_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            category_table.setStyle(_CATEGORY_TABLE_STYLE)
             
             story.append(category_table)
             story.append(Spacer(1, 16))
@@ -725,29 +916,21 @@ def export_pdf(year):
             ]
 
             summary_table = Table(summary_rows, colWidths=[3.0*inch, 2.0*inch])
-            summary_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('LINEABOVE', (0, 1), (-1, 1), 0.5, colors.black),
-                ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            summary_table.setStyle(_PROFIT_TABLE_STYLE)
             story.append(summary_table)
         else:
-            no_data = Paragraph("No expense data available", styles['Normal'])
+            no_data = Paragraph("No expense data available", _NORMAL_STYLE)
             story.append(no_data)
 
         # Switch to landscape for matrix pages
         story.append(NextPageTemplate('Landscape'))
         story.append(PageBreak())
-        matrix_header = Paragraph("Expenses by Vendor/Category Across Months", styles['Heading2'])
+        matrix_header = Paragraph("Expenses by Vendor/Category Across Months", _HEADING2_STYLE)
         story.append(matrix_header)
         story.append(Spacer(1, 12))
 
         # Prepare month labels and ordering
-        month_numbers = [f"{i:02d}" for i in range(1, 13)]
+        month_numbers = list(range(1, 13))
         month_labels = [
             'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
             'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
@@ -755,46 +938,47 @@ def export_pdf(year):
 
         # Build expense-only dataframe with month column
         if not expense_df.empty:
-            expense_df = expense_df.copy()
-            expense_df['amount'] = pd.to_numeric(expense_df['amount'])
-            # original df had negative for expenses; we converted to positive above
-            # Ensure month is extracted correctly from ISO date
-            expense_df['month'] = expense_df['date'].apply(lambda d: d[5:7])
-
-            # Normalize vendor names to group similar strings
-            pivot_source = expense_df.copy()
-            pivot_source['vendor'] = pivot_source['description'].apply(normalize_vendor)
-            pivot = pivot_source.pivot_table(
-                index='vendor',
-                columns='month',
-                values='amount',
-                aggfunc='sum',
-                fill_value=0.0
-            )
+            # original df had negative for expenses; expense_df holds them as positive amounts
 
-            # Ensure all months present in columns in correct order
-            for m in month_numbers:
-                if m not in pivot.columns:
-                    pivot[m] = 0.0
-            pivot = pivot[month_numbers]
+            if len(expense_df) == 1:
+                # A lone expense (e.g. early in the year) needs no grouping - fill its month directly
+                only = expense_df.iloc[0]
+                vendors = []
+                vals = np.zeros((0, 12))
+                if pd.notna(only['month']):
+                    vendors = [normalize_vendor(expense_df['description'].fillna('').iloc[0])]
+                    vals = np.zeros((1, 12))
+                    vals[0, int(only['month']) - 1] = only['amount']
+            else:
+                # Normalize vendor names to group similar strings (once per distinct description)
+                codes, descriptions = pd.factorize(expense_df['description'].fillna(''))
+                pivot_source = expense_df.assign(vendor=descriptions.map(normalize_vendor).to_numpy()[codes])
+                # Vendor x month sums with every month present, in calendar order
+                pivot = (
+                    pivot_source.groupby(['vendor', 'month'])['amount'].sum()
+                    .unstack('month', fill_value=0.0)
+                    .reindex(columns=month_numbers, fill_value=0.0)
+                )
+
+                # Sort rows by total descending (stable, so ties stay alphabetical)
+                vals = pivot.to_numpy()
+                order = np.argsort(-vals.sum(axis=1), kind='stable')
+                vendors = pivot.index[order].tolist()
+                vals = vals[order]
 
-            # Sort rows by total descending
-            pivot['__row_total__'] = pivot.sum(axis=1)
-            pivot = pivot.sort_values('__row_total__', ascending=False)
+            # Format cells in one pass; most vendors appear in only a few months so only non-empty cells are formatted
+            cells = np.full(vals.shape, '-', dtype=object)
+            has_value = np.abs(vals) > 0.004
+            cells[has_value] = [f"${val:,.2f}" for val in vals[has_value].tolist()]
 
-            # Build table data (wrap long descriptions)
+            # Build table data (wrap long descriptions); plain lists avoid boxing each row as a Series
             table_data = [["Expenses"] + month_labels]
-            for desc, row in pivot.drop(columns='__row_total__').iterrows():
-                row_values = [
-                    (f"${val:,.2f}" if abs(val) > 0.004 else '-')
-                    for val in row.tolist()
-                ]
-                desc_para = Paragraph(str(desc), styles['Normal'])
-                table_data.append([desc_para] + row_values)
+            for desc, row_values in zip(vendors, cells.tolist()):
+                table_data.append([Paragraph(str(desc), _NORMAL_STYLE)] + row_values)
 
             # Bottom totals per month
-            monthly_totals = [pivot.drop(columns='__row_total__')[m].sum() for m in month_numbers]
-            total_row = ["Total Cash Out"] + [f"${v:,.2f}" if v else '-' for v in monthly_totals]
+            monthly_totals = vals.sum(axis=0)
+            total_row = ["Total Cash Out"] + [f"${v:,.2f}" if v else '-' for v in monthly_totals.tolist()]
             table_data.append(total_row)
 
             # Compute dynamic column widths to fit page width (wider in landscape)
@@ -804,34 +988,20 @@ def export_pdf(year):
             month_col_width = (available_width - first_col_width) / 12.0
             col_widths = [first_col_width] + [month_col_width] * 12
             matrix_table = Table(table_data, colWidths=col_widths, repeatRows=1)
-            matrix_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('ALIGN', (1, 0), (-1, 0), 'CENTER'),
-                ('ALIGN', (1, 1), (-1, -2), 'CENTER'),
-                ('ALIGN', (1, -1), (-1, -1), 'CENTER'),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
+            matrix_table.setStyle(_MATRIX_TABLE_STYLE)
             story.append(matrix_table)
         else:
-            story.append(Paragraph("No expense transactions found for the year.", styles['Normal']))
+            story.append(Paragraph("No expense transactions found for the year.", _NORMAL_STYLE))
 
         # Income summary page (Landscape)
         story.append(PageBreak())
-        income_header = Paragraph("Income Summary Across Months", styles['Heading2'])
+        income_header = Paragraph("Income Summary Across Months", _HEADING2_STYLE)
         story.append(income_header)
         story.append(Spacer(1, 12))
 
         # Compute monthly Sales and Interest sums (income >= 0 categories Sales/Interest)
         # Prepare month ordering
-        month_numbers = [f"{i:02d}" for i in range(1, 13)]
+        month_numbers = list(range(1, 13))
         month_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
         # Build monthly income components
@@ -840,11 +1010,9 @@ def export_pdf(year):
         monthly_expenses_total = {m: 0.0 for m in month_numbers}
 
         if not df.empty:
-            df_copy = df.copy()
-            df_copy['month'] = df_copy['date'].apply(lambda d: d[5:7])
             for m in month_numbers:
                 # Sales: category == 'Sales' (positive by rule), sum amounts
-                month_rows = df_copy[df_copy['month'] == m]
+                month_rows = df[df['month'] == m]
                 if not month_rows.empty:
                     monthly_sales[m] = float(month_rows[month_rows['category'] == 'Sales']['amount'].sum())
                     monthly_interest[m] = float(month_rows[month_rows['category'] == 'Interest']['amount'].sum())
@@ -877,27 +1045,16 @@ def export_pdf(year):
         month_col_width = (available_width - first_col_width) / 12.0
         col_widths = [first_col_width] + [month_col_width] * 12
         income_table = Table(income_table_data, colWidths=col_widths, repeatRows=1)
-        income_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        income_table.setStyle(_INCOME_TABLE_STYLE)
         story.append(income_table)
 
         # Build PDF
         doc.build(story)
+        pdf_buffer.seek(0)
         
         # Return the PDF file
         return send_file(
-            temp_file.name,
+            pdf_buffer,
             as_attachment=True,
             download_name=f'expense-summary-{datetime.now().strftime("%Y-%m-%d")}.pdf',
             mimetype='application/pdf'
@@ -5,17 +5,19 @@ Automates the setup process for both backend and frontend
 """
 
 import os
+import shutil
 import subprocess
 import sys
 import platform
+import venv
 
 def run_command(command, cwd=None):
-    """Run a command and return success status"""
+    """Run a command (argument list, no shell) and return success status"""
     try:
-        print(f"Running: {command}")
-        result = subprocess.run(command, shell=True, cwd=cwd, check=True)
+        print(f"Running: {' '.join(command)}")
+        subprocess.run(command, cwd=cwd, check=True)
         return True
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, OSError) as e:
         print(f"Error running command: {e}")
         return False
 
@@ -47,18 +49,22 @@ def setup_backend():
     """Set up Python backend"""
     print("\n🐍 Setting up Python backend...")
     
-    # Create virtual environment
-    venv_command = "python -m venv venv"
-    if not run_command(venv_command, cwd="backend"):
+    # Create virtual environment in-process (no extra interpreter or shell)
+    venv_dir = os.path.abspath(os.path.join("backend", "venv"))
+    try:
+        print(f"Creating virtual environment: {venv_dir}")
+        venv.EnvBuilder(with_pip=True).create(venv_dir)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error creating virtual environment: {e}")
         return False
     
-    # Activate virtual environment and install dependencies
+    # Install dependencies with the venv's own interpreter - no activation needed
     if platform.system() == "Windows":
-        activate_command = "venv\\Scripts\\activate && pip install -r requirements.txt"
+        venv_python = os.path.join(venv_dir, "Scripts", "python.exe")
     else:
-        activate_command = "source venv/bin/activate && pip install -r requirements.txt"
+        venv_python = os.path.join(venv_dir, "bin", "python")
     
-    if not run_command(activate_command, cwd="backend"):
+    if not run_command([venv_python, "-m", "pip", "install", "-r", "requirements.txt"], cwd="backend"):
         return False
     
     print("✅ Backend setup complete!")
@@ -68,7 +74,13 @@ def setup_frontend():
     """Set up Next.js frontend"""
     print("\n⚛️  Setting up Next.js frontend...")
     
-    if not run_command("npm install", cwd="frontend-nextjs"):
+    # Resolve npm up front so Windows finds npm.cmd without going through a shell
+    npm = shutil.which("npm")
+    if not npm:
+        print("❌ npm not found. Please install Node.js 18+")
+        return False
+    
+    if not run_command([npm, "install"], cwd="frontend-nextjs"):
         return False
     
     print("✅ Frontend setup complete!")